@@ -12,9 +12,13 @@ setup(
     url="https://github.com/zmap/zmapsdk",
     packages=find_packages(),
     install_requires=[
-        "pydantic>=1.8.0,<2.0.0",  # For data validation
+        "pydantic>=2.0.0",  # For data validation
         "fastapi>=0.68.0",  # For REST API
+        "starlette>=1.5.0",  # For GZipMiddleware exclude_content_types
         "uvicorn>=0.15.0",  # For serving the API
+        "uvloop>=0.19.0; sys_platform != 'win32'",  # Faster event loop for uvicorn
+        "httptools>=0.6.0",  # Faster HTTP parsing for uvicorn
+        "orjson>=3.9.0",  # For fast JSON serialization
     ],
     extras_require={
         "dev": [
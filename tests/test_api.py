@@ -1,11 +1,25 @@
+import os
+import threading
+import time
 from collections.abc import Generator
+from concurrent.futures import Future
 from typing import Any
 from unittest.mock import MagicMock, patch
 
+import anyio
 import pytest
 from starlette.testclient import TestClient
 
-from zmapsdk.api import app
+from zmapsdk.api import (
+    THREADPOOL_SIZE,
+    _json_bytes,
+    _store_scan_result,
+    _temp_output,
+    active_scans,
+    app,
+    scan_results,
+)
+from zmapsdk.exceptions import ZMapInputError
 
 
 @pytest.fixture
@@ -55,6 +69,27 @@ def test_root_endpoint_success(
     mock_zmap.get_version.assert_called_once()
 
 
+def test_discovery_endpoints_are_cached(
+    client: TestClient, mock_zmap: Generator[MagicMock, Any, None]
+) -> None:
+    """Test that zmap discovery output is fetched once and then served from cache."""
+    mock_zmap.get_probe_modules.return_value = ["tcp_synscan", "icmp_echoscan"]
+    mock_zmap.get_output_fields.return_value = ["saddr", "daddr"]
+
+    for _ in range(2):
+        response = client.get("/probe-modules")
+        assert response.status_code == 200
+        assert response.json() == ["tcp_synscan", "icmp_echoscan"]
+        assert response.headers["cache-control"] == "public, max-age=3600"
+
+        response = client.get("/output-fields", params={"probe_module": "tcp_synscan"})
+        assert response.json() == ["saddr", "daddr"]
+
+    # Once for the body, once for the known-module check; ZMap caches the list
+    assert mock_zmap.get_probe_modules.call_count == 2
+    mock_zmap.get_output_fields.assert_called_once_with("tcp_synscan")
+
+
 def test_api_docs_endpoints(client: TestClient) -> None:
     """Test that api documentation endpoints exist."""
     response = client.get("/openapi.json")
@@ -68,3 +103,386 @@ def test_api_docs_endpoints(client: TestClient) -> None:
     response = client.get("/redoc")
     assert response.status_code == 200
     assert "redoc" in response.text
+
+
+def test_sync_scan_streams_results(
+    client: TestClient, mock_zmap: Generator[MagicMock, Any, None]
+) -> None:
+    """Test the synchronous scan endpoint streams the IPs found as NDJSON."""
+    mock_zmap.scan_iter.return_value = iter(["192.168.1.1", "192.168.1.2"])
+
+    response = client.post(
+        "/scan-sync",
+        json={"target_port": 80, "subnets": ["192.168.1.0/24"]},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.text == '{"ip":"192.168.1.1"}\n{"ip":"192.168.1.2"}\n'
+    mock_zmap.scan_iter.assert_called_once_with(
+        target_port=80, subnets=["192.168.1.0/24"]
+    )
+
+
+def test_sync_scan_writes_output_file(
+    client: TestClient, mock_zmap: Generator[MagicMock, Any, None], tmp_path
+) -> None:
+    """Test that a requested output file receives the streamed IPs."""
+    output_file = tmp_path / "results.txt"
+    mock_zmap.scan_iter.return_value = iter(["192.168.1.1", "192.168.1.2"])
+
+    response = client.post(
+        "/scan-sync", json={"target_port": 80, "output_file": str(output_file)}
+    )
+
+    assert len(response.text.splitlines()) == 2
+    assert output_file.read_text() == "192.168.1.1\n192.168.1.2\n"
+
+
+def test_sync_scan_reports_errors_in_stream(
+    client: TestClient, mock_zmap: Generator[MagicMock, Any, None]
+) -> None:
+    """Test that a scan failing mid-stream ends with an error line."""
+
+    def failing_scan(**kwargs: Any) -> Generator[str, Any, None]:
+        yield "192.168.1.1"
+        raise RuntimeError("zmap exited with status 1")
+
+    mock_zmap.scan_iter.side_effect = failing_scan
+
+    response = client.post("/scan-sync", json={"target_port": 80})
+
+    assert response.text.splitlines() == [
+        '{"ip":"192.168.1.1"}',
+        '{"error":"zmap exited with status 1"}',
+    ]
+
+
+def test_sync_scan_rejects_invalid_requests(
+    client: TestClient, mock_zmap: Generator[MagicMock, Any, None], tmp_path
+) -> None:
+    """Test that requests failing before the scan starts get an error status."""
+    mock_zmap.scan_iter.side_effect = ZMapInputError("Invalid subnet: not-a-subnet")
+
+    response = client.post("/scan-sync", json={"subnets": ["not-a-subnet"]})
+    assert response.status_code == 500
+    assert response.json() == {"detail": "Invalid subnet: not-a-subnet"}
+
+    mock_zmap.scan_iter.side_effect = None
+    mock_zmap.scan_iter.return_value = iter(["192.168.1.1"])
+    response = client.post(
+        "/scan-sync", json={"output_file": str(tmp_path / "missing" / "x.txt")}
+    )
+    assert response.status_code == 500
+
+
+def test_create_blocklist(
+    client: TestClient, mock_zmap: Generator[MagicMock, Any, None]
+) -> None:
+    """Test the blocklist endpoint reports the created file."""
+    mock_zmap.create_blocklist_file.return_value = "/tmp/blocklist.txt"
+
+    response = client.post(
+        "/blocklist",
+        json={
+            "subnets": [
+                "10.0.0.0/8",
+                "10.1.0.0/16",
+                "192.168.0.0/24",
+                "192.168.1.0/24",
+                "10.0.0.0/8",
+                "2001:db8::/32",
+            ],
+            "output_file": "/tmp/blocklist.txt",
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "file_path": "/tmp/blocklist.txt",
+        "message": "Blocklist file created with 3 subnets (collapsed from 6)",
+    }
+    mock_zmap.create_blocklist_file.assert_called_once_with(
+        ["10.0.0.0/8", "192.168.0.0/23", "2001:db8::/32"], "/tmp/blocklist.txt"
+    )
+
+
+def test_threadpool_size_raised(client: TestClient) -> None:
+    """Test that startup enlarges the threadpool used for blocking routes."""
+
+    async def total_tokens() -> int:
+        return anyio.to_thread.current_default_thread_limiter().total_tokens
+
+    assert client.portal.call(total_tokens) == THREADPOOL_SIZE
+
+
+def _wait_for_scan(client: TestClient, scan_id: str) -> dict[str, Any]:
+    """Poll a background scan until it is no longer running."""
+    for _ in range(500):
+        result = client.get(f"/scan/{scan_id}").json()
+        if result["status"] != "running":
+            return result
+        time.sleep(0.01)
+    raise AssertionError(f"Scan {scan_id} did not finish")
+
+
+def test_async_scan_lifecycle(
+    client: TestClient, mock_zmap: Generator[MagicMock, Any, None]
+) -> None:
+    """Test submitting a background scan and polling it until it completes."""
+    mock_zmap.scan.return_value = ["10.0.0.1"]
+
+    response = client.post(
+        "/scan", json={"target_port": 80, "output_file": "/tmp/zmap_out.txt"}
+    )
+    assert response.status_code == 202
+    body = response.json()
+    assert body["status"] == "running"
+    assert body["output_file"] == ["/tmp/zmap_out.txt"]
+
+    scan_id = body["scan_id"]
+    _wait_for_scan(client, scan_id)
+
+    for _ in range(2):
+        response = client.get(f"/scan/{scan_id}")
+        assert response.status_code == 200
+        assert response.json() == {
+            "scan_id": scan_id,
+            "status": "completed",
+            "ips_found": ["10.0.0.1"],
+        }
+    mock_zmap.scan.assert_called_once_with(
+        target_port=80, output_file="/tmp/zmap_out.txt"
+    )
+
+
+def test_async_scan_failure_and_unknown_id(
+    client: TestClient, mock_zmap: Generator[MagicMock, Any, None]
+) -> None:
+    """Test that scan errors are reported and unknown scan IDs return 404."""
+    mock_zmap.scan.side_effect = RuntimeError("zmap exited with status 1")
+
+    response = client.post("/scan", json={"output_file": "/tmp/zmap_out.txt"})
+    scan_id = response.json()["scan_id"]
+
+    assert _wait_for_scan(client, scan_id) == {
+        "scan_id": scan_id,
+        "status": "failed",
+        "error": ["zmap exited with status 1"],
+    }
+
+    assert client.get("/scan/does-not-exist").status_code == 404
+
+
+def test_async_scan_removes_temp_output_file(
+    client: TestClient, mock_zmap: Generator[MagicMock, Any, None]
+) -> None:
+    """Test that a scan's temporary output file is deleted once it finishes."""
+    mock_zmap.scan.return_value = ["10.0.0.1"]
+
+    response = client.post("/scan", json={"target_port": 80})
+    assert "output_file" not in response.json()
+    _wait_for_scan(client, response.json()["scan_id"])
+
+    temp_file = mock_zmap.scan.call_args.kwargs["output_file"]
+    assert os.path.basename(temp_file).startswith("zmap_api_")
+    assert not os.path.exists(temp_file)
+
+
+def test_async_scan_results_are_bounded(
+    client: TestClient, mock_zmap: Generator[MagicMock, Any, None]
+) -> None:
+    """Test that only the most recently polled finished scans are kept."""
+    mock_zmap.scan.return_value = []
+
+    with patch("zmapsdk.api.MAX_STORED_SCANS", 2):
+        scan_ids = []
+        for _ in range(3):
+            response = client.post("/scan", json={"output_file": "/tmp/zmap_out.txt"})
+            scan_ids.append(response.json()["scan_id"])
+            _wait_for_scan(client, scan_ids[-1])
+
+    assert client.get(f"/scan/{scan_ids[0]}").status_code == 404
+    assert client.get(f"/scan/{scan_ids[1]}").status_code == 200
+    assert client.get(f"/scan/{scan_ids[2]}").status_code == 200
+
+
+def test_async_scan_backlog_is_capped(
+    client: TestClient, mock_zmap: Generator[MagicMock, Any, None]
+) -> None:
+    """Test that /scan refuses new scans while too many are running or queued."""
+    release = threading.Event()
+
+    def blocked_scan(**kwargs: Any) -> list[str]:
+        release.wait(timeout=5)
+        return []
+
+    mock_zmap.scan.side_effect = blocked_scan
+
+    with patch("zmapsdk.api.MAX_ACTIVE_SCANS", 2):
+        scan_ids = [
+            client.post("/scan", json={"target_port": 80}).json()["scan_id"]
+            for _ in range(2)
+        ]
+        response = client.post("/scan", json={"target_port": 80})
+        assert response.status_code == 429
+
+        release.set()
+        for scan_id in scan_ids:
+            _wait_for_scan(client, scan_id)
+        assert client.post("/scan", json={"target_port": 80}).status_code == 202
+
+
+def test_cancelled_scan_removes_temp_output_file() -> None:
+    """Test that a scan cancelled before it started still deletes its temp file."""
+    temp_file = _temp_output("zmap_api_")
+    future: Future = Future()
+    future.cancel()
+    active_scans["cancelled"] = future
+
+    _store_scan_result("cancelled", temp_file, future)
+
+    assert not os.path.exists(temp_file)
+    assert "cancelled" not in active_scans
+    assert scan_results.pop("cancelled")["status"] == "failed"
+
+
+def test_output_fields_not_cached_for_unknown_probe_modules(
+    client: TestClient, mock_zmap: Generator[MagicMock, Any, None]
+) -> None:
+    """Test that unknown probe module names are looked up but never cached."""
+    mock_zmap.get_probe_modules.return_value = ["tcp_synscan"]
+    mock_zmap.get_output_fields.return_value = ["saddr"]
+
+    for _ in range(2):
+        response = client.get("/output-fields", params={"probe_module": "bogus"})
+        assert response.json() == ["saddr"]
+
+    assert mock_zmap.get_output_fields.call_count == 2
+    assert ("output_fields", "bogus") not in app.state.cache
+
+
+def test_refresh_clears_discovery_cache(
+    client: TestClient, mock_zmap: Generator[MagicMock, Any, None]
+) -> None:
+    """Test that /refresh makes the next discovery request ask zmap again."""
+    mock_zmap.get_output_modules.return_value = ["csv"]
+    client.get("/output-modules")
+
+    response = client.post("/refresh")
+    assert response.status_code == 204
+    mock_zmap.refresh.assert_called_once()
+
+    client.get("/output-modules")
+    assert mock_zmap.get_output_modules.call_count == 2
+
+
+def test_large_responses_are_gzipped(
+    client: TestClient, mock_zmap: Generator[MagicMock, Any, None]
+) -> None:
+    """Test that large JSON responses are compressed only when gzip is accepted."""
+    mock_zmap.scan.return_value = [f"10.0.{i // 256}.{i % 256}" for i in range(1000)]
+    response = client.post("/scan", json={"output_file": "/tmp/zmap_out.txt"})
+    scan_id = response.json()["scan_id"]
+    _wait_for_scan(client, scan_id)
+
+    with patch("zmapsdk.api._json_bytes", wraps=_json_bytes) as json_bytes:
+        response = client.get(f"/scan/{scan_id}", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"] == "application/json"
+    assert len(response.json()["ips_found"]) == 1000
+    # The result list goes straight to the fast serializer
+    json_bytes.assert_called_once()
+
+    response = client.get(f"/scan/{scan_id}", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+
+
+def test_sync_scan_stream_is_not_held_back_by_gzip(
+    mock_zmap: Generator[MagicMock, Any, None],
+) -> None:
+    """Test that a gzip-accepting client gets each result before the scan ends."""
+    release = threading.Event()
+
+    def slow_scan(**kwargs: Any) -> Generator[str, Any, None]:
+        yield "10.0.0.1"
+        # Keep the scan open until the client has seen output
+        release.wait(timeout=5)
+        yield "10.0.0.2"
+
+    mock_zmap.scan_iter.side_effect = slow_scan
+    app.state.zmap = mock_zmap
+    chunks: list[tuple[bool, bytes]] = []
+    start: dict[str, Any] = {}
+
+    requests = [{"type": "http.request", "body": b'{"target_port": 80}'}]
+
+    async def receive() -> dict[str, Any]:
+        if requests:
+            return requests.pop()
+        # The client stays connected for the whole stream
+        await anyio.sleep_forever()
+
+    async def send(message: dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            start.update(message)
+        elif message.get("body"):
+            # Record whether the scan was still running when this arrived
+            chunks.append((release.is_set(), message["body"]))
+            release.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/scan-sync",
+        "raw_path": b"/scan-sync",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"accept-encoding", b"gzip"),
+        ],
+        "client": ("testclient", 50000),
+        "server": ("testserver", 80),
+    }
+    anyio.run(app, scope, receive, send)
+
+    assert (b"content-encoding", b"gzip") not in start["headers"]
+    assert chunks == [
+        (False, b'{"ip":"10.0.0.1"}\n'),
+        (True, b'{"ip":"10.0.0.2"}\n'),
+    ]
+
+
+def test_discovery_endpoints_honor_etag(
+    client: TestClient, mock_zmap: Generator[MagicMock, Any, None]
+) -> None:
+    """Test that a matching If-None-Match gets a 304 without a body."""
+    mock_zmap.get_output_modules.return_value = ["csv", "json"]
+
+    response = client.get("/output-modules")
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+    assert response.json() == ["csv", "json"]
+
+    response = client.get("/output-modules", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    response = client.get("/output-modules", headers={"If-None-Match": 'W/"stale"'})
+    assert response.status_code == 200
+    assert response.json() == ["csv", "json"]
+
+
+def test_json_bytes_matches_without_orjson() -> None:
+    """Test that the stdlib fallback serializes exactly like orjson."""
+    value = {"ip": "10.0.0.1", "error": "zmap: ünknown flag", "ports": [80, 443]}
+
+    with patch("zmapsdk.api.orjson", None):
+        expected = _json_bytes(value)
+
+    assert _json_bytes(value) == expected
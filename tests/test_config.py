@@ -1,3 +1,6 @@
+import json
+from unittest.mock import patch
+
 import pytest
 
 from zmapsdk import ZMapConfigError, ZMapScanConfig
@@ -22,3 +25,98 @@ def test_config() -> None:
             f"Invalid source port range: {conf.source_port}. Must be between 0 and 65535."
             in str(exc_info.value)
         )
+
+
+@pytest.mark.parametrize(
+    "mac, valid",
+    [
+        ("00:11:22:33:44:55", True),
+        ("aa-bb-cc-dd-ee-ff", True),
+        ("AA:bb:CC:dd:EE:ff", True),
+        ("00:11:22:33:44", False),
+        ("00:11:22:33:44:5G", False),
+        ("001122334455", False),
+        ("00:11:22:33:44:55:66", False),
+        ("00:11-22:33-44:55", False),
+        ("00:11:22:33:44:55\n", False),
+        ("  :11:22:33:44:55", False),
+    ],
+)
+def test_mac_validation(mac: str, valid: bool) -> None:
+    """Test MAC address validation."""
+    assert ZMapScanConfig._is_valid_mac(mac) is valid
+    if not valid:
+        with pytest.raises(ZMapConfigError):
+            ZMapScanConfig(gateway_mac=mac)
+
+
+def test_config_round_trip() -> None:
+    """Test that a config survives a to_dict/to_json round trip without None values."""
+    conf = ZMapScanConfig(
+        target_port=443,
+        rate=1000,
+        cores=[0, 1],
+        user_metadata={"team": "ops"},
+    )
+
+    data = conf.to_dict()
+    assert list(data) == [
+        "target_port",
+        "rate",
+        "vpn",
+        "dryrun",
+        "cores",
+        "ignore_invalid_hosts",
+        "user_metadata",
+    ]
+    assert ZMapScanConfig.from_dict(data) == conf
+    assert ZMapScanConfig.from_json(conf.to_json()) == conf
+
+
+def test_to_json_matches_stdlib() -> None:
+    """Test that to_json output is identical with and without orjson."""
+    conf = ZMapScanConfig(target_port=80, notes="weekly", user_metadata={"a": [1, 2]})
+
+    with patch("zmapsdk.config.orjson", None):
+        expected = conf.to_json()
+
+    assert conf.to_json() == expected
+    assert json.loads(expected) == conf.to_dict()
+
+
+def test_config_uses_slots() -> None:
+    """Test that config instances are slotted and reject unknown attributes."""
+    conf = ZMapScanConfig(target_port=80)
+
+    assert not hasattr(conf, "__dict__")
+    with pytest.raises(AttributeError):
+        conf.probe_module = "tcp_synscan"
+
+
+@pytest.mark.parametrize("source_port", ["1000-2000", "0-65535", "80-80"])
+def test_valid_source_port_range(source_port: str) -> None:
+    """Test that well-formed source port ranges are accepted."""
+    assert ZMapScanConfig(source_port=source_port).source_port == source_port
+
+
+@pytest.mark.parametrize(
+    "source_port",
+    [
+        "1000-",
+        "-2000",
+        "a-b",
+        "1-2-3",
+        "2000-1000",
+        "0-70000",
+        "1_000-2_000",
+        " 80-90 ",
+        "+1-2",
+        # Non-ASCII decimal digits (Arabic-Indic and full-width)
+        "\u0661\u0660\u0660\u0660-\u0662\u0660\u0660\u0660",
+        "\uff11\uff10-\uff12\uff10",
+    ],
+)
+def test_invalid_source_port_range(source_port: str) -> None:
+    """Test that malformed or out-of-range source port ranges are rejected."""
+    with pytest.raises(ZMapConfigError):
+        ZMapScanConfig(source_port=source_port)
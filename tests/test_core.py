@@ -0,0 +1,128 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from zmapsdk import ZMap, ZMapCommandError
+
+
+def test_scan_passes_unknown_options_to_zmap() -> None:
+    """Test that scan options without a config field are passed through to zmap."""
+    with patch("zmapsdk.core.ZMapRunner") as mock_runner_cls:
+        mock_runner = MagicMock()
+        mock_runner.scan.return_value = ["10.0.0.1"]
+        mock_runner_cls.return_value = mock_runner
+
+        results = ZMap().scan(
+            target_port=80,
+            subnets=["10.0.0.0/24"],
+            rate=100,
+            probe_module="tcp_synscan",
+            verbosity=3,
+        )
+
+    assert results == ["10.0.0.1"]
+    kwargs = mock_runner.scan.call_args.kwargs
+    assert kwargs["probe_module"] == "tcp_synscan"
+    assert kwargs["config"].target_port == 80
+    assert kwargs["config"].rate == 100
+    assert kwargs["input_config"].target_subnets == ["10.0.0.0/24"]
+    assert kwargs["output_config"].verbosity == 3
+
+
+def test_scan_iter_streams_stdout() -> None:
+    """Test that scan_iter yields IPs from zmap's stdout, skipping the csv header."""
+    with patch("zmapsdk.runner.ZMapRunner._check_zmap_exists"):
+        zmap = ZMap(zmap_path="printf")
+
+    # printf ignores the zmap flags and prints a csv header and two results
+    with patch.object(
+        zmap.runner,
+        "_build_command",
+        return_value=["printf", "saddr\\n10.0.0.1\\n\\n10.0.0.2\\n"],
+    ):
+        results = list(zmap.scan_iter(target_port=80, subnets=["10.0.0.0/24"]))
+
+    assert results == ["10.0.0.1", "10.0.0.2"]
+
+
+def test_scan_iter_raises_on_failure() -> None:
+    """Test that scan_iter raises ZMapCommandError when zmap exits with an error."""
+    with patch("zmapsdk.runner.ZMapRunner._check_zmap_exists"):
+        zmap = ZMap()
+
+    with patch.object(
+        zmap.runner,
+        "_build_command",
+        return_value=["sh", "-c", "echo bad flag >&2; exit 1"],
+    ):
+        with pytest.raises(ZMapCommandError) as exc_info:
+            list(zmap.scan_iter(target_port=80))
+
+    assert exc_info.value.returncode == 1
+    assert "bad flag" in exc_info.value.stderr
+
+
+def test_discovery_results_cached_until_refresh() -> None:
+    """Test that zmap discovery calls are cached until refresh() is called."""
+    with patch("zmapsdk.core.ZMapRunner") as mock_runner_cls:
+        mock_runner = MagicMock()
+        mock_runner.get_version.return_value = "zmap 4.1.0"
+        mock_runner_cls.return_value = mock_runner
+        zmap = ZMap()
+
+    assert zmap.get_version() == "zmap 4.1.0"
+    assert zmap.get_version() == "zmap 4.1.0"
+    mock_runner.get_version.assert_called_once()
+
+    zmap.refresh()
+    zmap.get_version()
+    assert mock_runner.get_version.call_count == 2
+
+
+def test_scan_iter_merges_overlapping_options() -> None:
+    """Test that an option set by more than one config object is passed once."""
+    with patch("zmapsdk.runner.ZMapRunner._check_zmap_exists"):
+        zmap = ZMap(zmap_path="echo")
+
+    # echo prints the flags zmap would have been given as a single line
+    (line,) = zmap.scan_iter(target_port=80, ignore_invalid_hosts=True)
+
+    assert line.split().count("--ignore-invalid-hosts") == 1
+    assert "--target-port=80" in line.split()
+
+
+def test_discovery_cache_is_per_instance_and_copied() -> None:
+    """Test that refresh() only clears its own instance and results are copies."""
+    with patch("zmapsdk.core.ZMapRunner") as mock_runner_cls:
+        first_runner, second_runner = MagicMock(), MagicMock()
+        first_runner.get_probe_modules.return_value = ["tcp_synscan"]
+        second_runner.get_probe_modules.return_value = ["icmp_echoscan"]
+        mock_runner_cls.side_effect = [first_runner, second_runner]
+        first, second = ZMap(), ZMap()
+
+    first.get_probe_modules().append("bogus")
+    assert first.get_probe_modules() == ["tcp_synscan"]
+    second.get_probe_modules()
+
+    first.refresh()
+    first.get_probe_modules()
+    second.get_probe_modules()
+
+    assert first_runner.get_probe_modules.call_count == 2
+    second_runner.get_probe_modules.assert_called_once()
+
+
+def test_output_fields_cached_only_for_known_probe_modules() -> None:
+    """Test that output fields for unknown probe module names are never cached."""
+    with patch("zmapsdk.core.ZMapRunner") as mock_runner_cls:
+        mock_runner = MagicMock()
+        mock_runner.get_probe_modules.return_value = ["tcp_synscan"]
+        mock_runner.get_output_fields.return_value = ["saddr"]
+        mock_runner_cls.return_value = mock_runner
+        zmap = ZMap()
+
+    for probe_module in (None, "tcp_synscan", "bogus", None, "tcp_synscan", "bogus"):
+        assert zmap.get_output_fields(probe_module) == ["saddr"]
+
+    assert mock_runner.get_output_fields.call_count == 4
+    assert ("output_fields", "bogus") not in zmap._discovery_cache
@@ -0,0 +1,37 @@
+import pytest
+
+from zmapsdk import ZMapInput, ZMapInputError
+
+
+def test_create_blocklist_file(tmp_path) -> None:
+    """Test that a blocklist file is written with one subnet per line."""
+    output_file = tmp_path / "blocklist.txt"
+    zmap_input = ZMapInput()
+
+    path = zmap_input.create_blocklist_file(
+        ["10.0.0.0/8", "192.168.0.0/16"], str(output_file)
+    )
+
+    assert path == str(output_file)
+    assert output_file.read_text() == "10.0.0.0/8\n192.168.0.0/16\n"
+    assert zmap_input.blocklist_file == str(output_file)
+
+
+def test_create_blocklist_file_invalid_subnet(tmp_path) -> None:
+    """Test that an invalid subnet is rejected before anything is written."""
+    output_file = tmp_path / "blocklist.txt"
+
+    with pytest.raises(ZMapInputError):
+        ZMapInput().create_blocklist_file(["not-a-subnet"], str(output_file))
+
+    assert not output_file.exists()
+
+
+def test_create_allowlist_file_spans_writev_batches(tmp_path) -> None:
+    """Test that lists longer than one writev() batch are written in full."""
+    output_file = tmp_path / "allowlist.txt"
+    subnets = [f"10.{i // 256}.{i % 256}.0/24" for i in range(5000)]
+
+    ZMapInput().create_allowlist_file(subnets, str(output_file))
+
+    assert output_file.read_text().splitlines() == subnets
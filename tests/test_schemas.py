@@ -1,3 +1,6 @@
+import pytest
+from pydantic import ValidationError
+
 from zmapsdk.schemas import ScanRequest
 
 
@@ -26,3 +29,9 @@ def test_full_valid_request():
     assert request.target_port == 80
     assert request.subnets == ["192.168.1.0/24", "10.0.0.0/8"]
     assert request.return_results is True
+
+
+def test_unknown_field_rejected():
+    """Test that unknown fields are rejected instead of silently dropped"""
+    with pytest.raises(ValidationError):
+        ScanRequest(target_port=80, target_prot=443)
@@ -1,10 +1,22 @@
+import hashlib
+import ipaddress
+import json
 import os
 import tempfile
-from contextlib import asynccontextmanager
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager, nullcontext
 
 import psutil
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from anyio import to_thread
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES
 
 from zmapsdk.core import ZMap
 from zmapsdk.schemas import (
@@ -15,8 +27,32 @@ from zmapsdk.schemas import (
     StandardBlocklistRequest,
 )
 
-# Scan tracking dictionary
-active_scans = {}
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Scan tracking dictionary: futures of background scans that haven't finished
+active_scans: dict[str, Future] = {}
+
+# Outcomes of finished background scans, least recently polled first
+scan_results: OrderedDict[str, dict] = OrderedDict()
+_scans_lock = threading.Lock()
+
+# Background scans allowed to run at once; more would only contend for the NIC
+MAX_CONCURRENT_SCANS = 4
+
+# Background scans allowed to be running or queued before /scan answers 429
+MAX_ACTIVE_SCANS = 32
+
+# Finished scans kept for polling before the least recently polled is dropped
+MAX_STORED_SCANS = 100
+
+# Worker threads available to blocking routes (anyio defaults to 40)
+THREADPOOL_SIZE = 200
+
+# ZMap discovery output only changes when the binary does
+CACHE_CONTROL = "public, max-age=3600"
 
 
 # Initialize ZMap instance for API
@@ -24,8 +60,18 @@ active_scans = {}
 async def lifespan(app: FastAPI):
     # Initialize ZMap on startup
     app.state.zmap = ZMap()
+    # Serialized discovery responses and their ETags, filled in on first use
+    app.state.cache = {}
+    # Raise the threadpool limit so concurrent scans don't queue behind it
+    limiter = to_thread.current_default_thread_limiter()
+    limiter.total_tokens = THREADPOOL_SIZE
+    # Worker pool for scans submitted through /scan
+    app.state.scan_executor = ThreadPoolExecutor(
+        max_workers=MAX_CONCURRENT_SCANS, thread_name_prefix="zmap_scan"
+    )
     yield
-    # Clean up on shutdown (if needed)
+    # Clean up on shutdown
+    app.state.scan_executor.shutdown(wait=False, cancel_futures=True)
 
 
 # Initialize FastAPI
@@ -36,143 +82,362 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Compress larger responses for clients that accept gzip. NDJSON scan streams
+# are left alone: the middleware never flushes its gzip buffer, so results
+# would be held back until the scan ends.
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=1024,
+    compresslevel=5,
+    exclude_content_types=(*DEFAULT_EXCLUDED_CONTENT_TYPES, "application/x-ndjson"),
+)
+
+
+def _json_bytes(value) -> bytes:
+    """Serialize a value to compact JSON, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _json_response(value, status_code: int = 200) -> Response:
+    """Wrap a value in a JSON response without FastAPI's jsonable_encoder pass"""
+    return Response(
+        content=_json_bytes(value),
+        status_code=status_code,
+        media_type="application/json",
+    )
+
+
+def _temp_output(prefix: str) -> str:
+    """Create an empty temporary file for zmap to write to and return its path"""
+    temp_fd, output_file = tempfile.mkstemp(prefix=prefix, suffix=".txt")
+    os.close(temp_fd)
+    return output_file
+
+
+def _scan_params(scan_request: ScanRequest, output_file: str) -> dict:
+    """Build ZMap.scan keyword arguments from a scan request"""
+    params = scan_request.model_dump(exclude_none=True, exclude={"return_results"})
+    params["output_file"] = output_file
+    return params
+
+
+def _collapse_subnets(subnets: list[str]) -> list[str]:
+    """Merge duplicate, overlapping and adjacent subnets into a minimal list"""
+    networks = [ipaddress.ip_network(subnet, strict=False) for subnet in subnets]
+    # collapse_addresses can't mix address families
+    return [
+        str(network)
+        for version in (4, 6)
+        for network in ipaddress.collapse_addresses(
+            n for n in networks if n.version == version
+        )
+    ]
+
+
+async def _cached_response(request: Request, key, func, *args) -> Response:
+    """
+    Serve a cached discovery result as JSON with a weak ETag
+
+    The body is serialized once on a miss; requests whose If-None-Match
+    carries the current ETag get an empty 304 instead. A key of None skips
+    the cache and fetches the result every time.
+    """
+    cache = app.state.cache
+    entry = cache.get(key) if key is not None else None
+    if entry is None:
+        body = _json_bytes(await run_in_threadpool(func, *args))
+        entry = (body, f'W/"{hashlib.sha1(body).hexdigest()}"')
+        if key is not None:
+            cache[key] = entry
+    body, etag = entry
+
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 
 @app.get("/", tags=["Info"])
-async def root():
+async def root(response: Response):
     """API root endpoint with basic information"""
+    response.headers["Cache-Control"] = CACHE_CONTROL
     return {
         "name": "ZMap SDK API",
-        "version": app.state.zmap.get_version(),
+        "version": await run_in_threadpool(app.state.zmap.get_version),
         "description": "REST API for ZMap network scanner",
     }
 
 
 @app.get("/probe-modules", tags=["Info"], response_model=list[str])
-async def get_probe_modules():
+async def get_probe_modules(request: Request):
     """Get available probe modules"""
-    return app.state.zmap.get_probe_modules()
+    return await _cached_response(
+        request, "probe_modules", app.state.zmap.get_probe_modules
+    )
 
 
 @app.get("/output-modules", tags=["Info"], response_model=list[str])
-async def get_output_modules():
+async def get_output_modules(request: Request):
     """Get available output modules"""
-    return app.state.zmap.get_output_modules()
+    return await _cached_response(
+        request, "output_modules", app.state.zmap.get_output_modules
+    )
 
 
 @app.get("/output-fields", tags=["Info"], response_model=list[str])
-async def get_output_fields(probe_module: str | None = None):
+async def get_output_fields(request: Request, probe_module: str | None = None):
     """Get available output fields for a probe module"""
-    return app.state.zmap.get_output_fields(probe_module)
+    key = ("output_fields", probe_module)
+    # Only cache known modules so arbitrary query values can't grow the cache;
+    # ZMap caches the module list itself
+    if key not in app.state.cache and probe_module is not None:
+        if probe_module not in await run_in_threadpool(
+            app.state.zmap.get_probe_modules
+        ):
+            key = None
+    return await _cached_response(
+        request,
+        key,
+        app.state.zmap.get_output_fields,
+        probe_module,
+    )
+
+
+@app.post("/refresh", tags=["Info"], status_code=204)
+async def refresh():
+    """Forget cached zmap discovery output, e.g. after upgrading the binary"""
+    app.state.cache.clear()
+    app.state.zmap.refresh()
 
 
 @app.get("/interfaces", tags=["Info"], response_model=list[str])
-async def get_interfaces():
+async def get_interfaces(request: Request):
     """Get available network interfaces"""
-    return [iface for iface in psutil.net_if_addrs().keys()]
+    return await _cached_response(
+        request, "interfaces", lambda: list(psutil.net_if_addrs().keys())
+    )
 
 
-@app.post("/blocklist", tags=["Input"])
-async def create_blocklist(request: BlocklistRequest) -> FileResponse:
+@app.post(
+    "/blocklist",
+    tags=["Input"],
+    response_model=None,
+    responses={200: {"model": FileResponse}},
+)
+async def create_blocklist(request: BlocklistRequest) -> dict[str, str]:
     """Create a blocklist file from a list of subnets"""
     try:
+        subnets = await run_in_threadpool(_collapse_subnets, request.subnets)
+
         # Use provided output file or create temporary one
-        output_file = request.output_file
-        if not output_file:
-            temp_fd, output_file = tempfile.mkstemp(
-                prefix="zmap_blocklist_",
-                suffix=".txt",
-            )
-            os.close(temp_fd)
-
-        file_path = app.state.zmap.create_blocklist_file(request.subnets, output_file)
-
-        return FileResponse(
-            file_path=file_path,
-            message=f"Blocklist file created with {len(request.subnets)} subnets",
+        output_file = request.output_file or _temp_output("zmap_blocklist_")
+
+        file_path = await run_in_threadpool(
+            app.state.zmap.create_blocklist_file, subnets, output_file
         )
+
+        return {
+            "file_path": file_path,
+            "message": (
+                f"Blocklist file created with {len(subnets)} subnets "
+                f"(collapsed from {len(request.subnets)})"
+            ),
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/standard-blocklist", tags=["Input"])
+@app.post(
+    "/standard-blocklist",
+    tags=["Input"],
+    response_model=None,
+    responses={200: {"model": FileResponse}},
+)
 async def generate_standard_blocklist(
     request: StandardBlocklistRequest,
-) -> FileResponse:
+) -> dict[str, str]:
     """Generate a standard blocklist file"""
     try:
         # Use provided output file or create temporary one
-        output_file = request.output_file
-        if not output_file:
-            temp_fd, output_file = tempfile.mkstemp(
-                prefix="zmap_std_blocklist_",
-                suffix=".txt",
-            )
-            os.close(temp_fd)
-
-        file_path = app.state.zmap.generate_standard_blocklist(output_file)
-
-        return FileResponse(
-            file_path=file_path, message="Standard blocklist file created"
+        output_file = request.output_file or _temp_output("zmap_std_blocklist_")
+
+        file_path = await run_in_threadpool(
+            app.state.zmap.generate_standard_blocklist, output_file
         )
+
+        return {"file_path": file_path, "message": "Standard blocklist file created"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/allowlist", tags=["Input"])
-async def create_allowlist(request: BlocklistRequest) -> FileResponse:
+@app.post(
+    "/allowlist",
+    tags=["Input"],
+    response_model=None,
+    responses={200: {"model": FileResponse}},
+)
+async def create_allowlist(request: BlocklistRequest) -> dict[str, str]:
     """Create an allowlist file from a list of subnets"""
     try:
+        subnets = await run_in_threadpool(_collapse_subnets, request.subnets)
+
         # Use provided output file or create temporary one
-        output_file = request.output_file
-        if not output_file:
-            temp_fd, output_file = tempfile.mkstemp(
-                prefix="zmap_allowlist_",
-                suffix=".txt",
-            )
-            os.close(temp_fd)
-
-        file_path = app.state.zmap.create_allowlist_file(request.subnets, output_file)
-
-        return FileResponse(
-            file_path=file_path,
-            message=f"Allowlist file created with {len(request.subnets)} subnets",
+        output_file = request.output_file or _temp_output("zmap_allowlist_")
+
+        file_path = await run_in_threadpool(
+            app.state.zmap.create_allowlist_file, subnets, output_file
         )
+
+        return {
+            "file_path": file_path,
+            "message": (
+                f"Allowlist file created with {len(subnets)} subnets "
+                f"(collapsed from {len(request.subnets)})"
+            ),
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/scan-sync", tags=["Scan"], response_model=ScanResult)
+@app.post(
+    "/scan-sync",
+    tags=["Scan"],
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}},
+            "description": 'One {"ip": ...} object per line as ZMap reports it',
+        },
+    },
+)
 async def sync_scan(scan_request: ScanRequest):
-    """Run a ZMap scan synchronously and return results directly"""
-    # Set default output file if not provided
+    """Run a ZMap scan and stream the responding IPs as newline-delimited JSON"""
+    # zmap writes results to stdout here, so an output file is filled in as
+    # the results are streamed
     output_file = scan_request.output_file
-    if not output_file:
-        temp_fd, output_file = tempfile.mkstemp(prefix="zmap_api_", suffix=".txt")
-        os.close(temp_fd)
+    params = scan_request.model_dump(
+        exclude_none=True, exclude={"return_results", "output_file"}
+    )
 
+    def start():
+        # Configs are validated here; zmap itself only starts once iterated
+        results = app.state.zmap.scan_iter(**params)
+        return results, open(output_file, "w") if output_file else None
+
+    # Fail before the 200 headers go out if the request can't be scanned
     try:
-        # Convert model to dict and remove None values
-        params = {
-            k: v
-            for k, v in scan_request.dict().items()
-            if v is not None and k != "return_results"
-        }
+        results, f = await run_in_threadpool(start)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    def stream():
+        try:
+            with f if f is not None else nullcontext():
+                for ip in results:
+                    if f is not None:
+                        f.write(f"{ip}\n")
+                    yield _json_bytes({"ip": ip}) + b"\n"
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            yield _json_bytes({"error": str(e)}) + b"\n"
+
+    # Starlette iterates sync generators in the threadpool, off the event loop
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 
-        # Ensure output file is set
-        params["output_file"] = output_file
+def _run_scan(zmap: ZMap, params: dict, temp_file: str | None) -> list[str]:
+    """Run a background scan, removing its temporary output file afterwards"""
+    try:
+        return zmap.scan(**params)
+    finally:
+        if temp_file and os.path.exists(temp_file):
+            os.unlink(temp_file)
+
+
+def _store_scan_result(scan_id: str, temp_file: str | None, future: Future) -> None:
+    """Move a finished scan's outcome into the bounded result store"""
+    if future.cancelled():
+        # Cancelled before _run_scan started, so its cleanup never ran
+        if temp_file and os.path.exists(temp_file):
+            os.unlink(temp_file)
+        result = {"scan_id": scan_id, "status": "failed", "error": ["Scan cancelled"]}
+    else:
+        try:
+            result = {
+                "scan_id": scan_id,
+                "status": "completed",
+                "ips_found": future.result(),
+            }
+        except Exception as e:
+            result = {"scan_id": scan_id, "status": "failed", "error": [str(e)]}
+
+    with _scans_lock:
+        active_scans.pop(scan_id, None)
+        scan_results[scan_id] = result
+        while len(scan_results) > MAX_STORED_SCANS:
+            scan_results.popitem(last=False)
+
+
+@app.post(
+    "/scan",
+    tags=["Scan"],
+    status_code=202,
+    responses={
+        202: {"model": ScanResult},
+        429: {"description": "Too many scans running or queued"},
+    },
+)
+async def async_scan(scan_request: ScanRequest):
+    """Start a ZMap scan in the background and return its ID for polling"""
+    # The executor queue is unbounded, so cap the backlog here
+    if len(active_scans) >= MAX_ACTIVE_SCANS:
+        raise HTTPException(
+            status_code=429, detail="Too many scans running or queued, retry later"
+        )
 
-        # Run scan synchronously
-        results = app.state.zmap.scan(**params)
+    temp_file = None if scan_request.output_file else _temp_output("zmap_api_")
+    output_file = scan_request.output_file or temp_file
+    scan_id = uuid.uuid4().hex
 
-        # Return results directly
-        return ScanResult(
-            scan_id="direct_scan",
-            status="completed",
-            ips_found=results,
+    try:
+        params = _scan_params(scan_request, output_file)
+        future = app.state.scan_executor.submit(
+            _run_scan, app.state.zmap, params, temp_file
         )
     except Exception as e:
+        if temp_file:
+            os.unlink(temp_file)
         raise HTTPException(status_code=500, detail=str(e))
 
+    with _scans_lock:
+        active_scans[scan_id] = future
+    future.add_done_callback(lambda done: _store_scan_result(scan_id, temp_file, done))
+
+    result = {"scan_id": scan_id, "status": "running"}
+    if scan_request.output_file:
+        result["output_file"] = [scan_request.output_file]
+    return _json_response(result, status_code=202)
+
+
+@app.get("/scan/{scan_id}", tags=["Scan"], responses={200: {"model": ScanResult}})
+async def get_scan(scan_id: str):
+    """Get the status, and once finished the results, of a background scan"""
+    with _scans_lock:
+        result = scan_results.get(scan_id)
+        if result is not None:
+            scan_results.move_to_end(scan_id)
+        elif scan_id in active_scans:
+            result = {"scan_id": scan_id, "status": "running"}
+
+    if result is not None:
+        # ips_found can hold millions of addresses; skip jsonable_encoder
+        return _json_response(result)
+
+    raise HTTPException(status_code=404, detail=f"Scan not found: {scan_id}")
+
 
 class APIServer:
     """
@@ -195,4 +460,6 @@ class APIServer:
         """
         Run the API server
         """
-        uvicorn.run(app, host=self.host, port=self.port)
+        # uvicorn's default "auto" loop and http settings already pick uvloop
+        # and httptools when they are installed
+        uvicorn.run(app, host=self.host, port=self.port, log_level="warning")
@@ -3,13 +3,22 @@ Configuration module for ZMap SDK
 """
 
 import json
-from dataclasses import asdict, dataclass
+import re
+from dataclasses import dataclass, fields
 from typing import Any
 
 from .exceptions import ZMapConfigError
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-@dataclass
+# Six hex octets joined by a single, consistent ':' or '-' separator
+_MAC_RE = re.compile(r"[0-9A-Fa-f]{2}([:-])(?:[0-9A-Fa-f]{2}\1){4}[0-9A-Fa-f]{2}")
+
+
+@dataclass(slots=True)
 class ZMapScanConfig:
     """
     Configuration for a ZMap scan
@@ -95,12 +104,14 @@ class ZMapScanConfig:
 
         if self.source_port is not None:
             if isinstance(self.source_port, str) and "-" in self.source_port:
-                parts = self.source_port.split("-")
-                if len(parts) != 2 or not all(p.isdigit() for p in parts):
+                start, _, end = self.source_port.partition("-")
+                if not all(
+                    part.isascii() and part.isdecimal() for part in (start, end)
+                ):
                     raise ZMapConfigError(
                         f"Invalid source port range: {self.source_port}.",
                     )
-                start, end = map(int, parts)
+                start, end = int(start), int(end)
                 if not (0 <= start <= end <= 65535):
                     raise ZMapConfigError(
                         f"Invalid source port range: {self.source_port}. Must be between 0 and 65535.",
@@ -132,20 +143,22 @@ class ZMapScanConfig:
     @staticmethod
     def _is_valid_mac(mac: str) -> bool:
         """Check if a string is a valid MAC address"""
-        import re
-
-        return bool(re.match(r"^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$", mac))
+        return _MAC_RE.fullmatch(mac) is not None
 
     def to_dict(self) -> dict[str, Any]:
         """Convert configuration to a dictionary, removing None values"""
+        # Replaced by an unrolled version below the class; see _build_to_dict
         result = {}
-        for key, value in asdict(self).items():
+        for field in fields(self):
+            value = getattr(self, field.name)
             if value is not None:
-                result[key] = value
+                result[field.name] = value
         return result
 
     def to_json(self) -> str:
         """Convert configuration to a JSON string"""
+        if orjson is not None:
+            return orjson.dumps(self.to_dict(), option=orjson.OPT_INDENT_2).decode()
         return json.dumps(self.to_dict(), indent=2)
 
     @classmethod
@@ -156,6 +169,8 @@ class ZMapScanConfig:
     @classmethod
     def from_json(cls, json_str: str) -> "ZMapScanConfig":
         """Create a configuration from a JSON string"""
+        if orjson is not None:
+            return cls.from_dict(orjson.loads(json_str))
         return cls.from_dict(json.loads(json_str))
 
     def save_to_file(self, filename: str) -> None:
@@ -168,3 +183,33 @@ class ZMapScanConfig:
         """Load configuration from a JSON file"""
         with open(filename) as f:
             return cls.from_json(f.read())
+
+
+def _build_to_dict(cls: type) -> Any:
+    """
+    Generate a to_dict method with one unrolled None check per dataclass field
+
+    The fields are fixed when the class is defined, so spelling out each
+    attribute access avoids the per-call loop and getattr() lookups.
+    """
+    lines = ["def to_dict(self):", "    result = {}"]
+    for field in fields(cls):
+        lines += [
+            f"    value = self.{field.name}",
+            "    if value is not None:",
+            f"        result[{field.name!r}] = value",
+        ]
+    lines.append("    return result")
+
+    namespace: dict[str, Any] = {}
+    exec("\n".join(lines), {"__name__": __name__}, namespace)
+    to_dict = namespace["to_dict"]
+    # Keep the declared method's metadata for help() and the docs
+    declared = cls.to_dict
+    to_dict.__qualname__ = declared.__qualname__
+    to_dict.__doc__ = declared.__doc__
+    to_dict.__annotations__ = dict(declared.__annotations__)
+    return to_dict
+
+
+ZMapScanConfig.to_dict = _build_to_dict(ZMapScanConfig)
@@ -2,7 +2,8 @@
 Core module for ZMap SDK
 """
 
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
+from dataclasses import fields
 from typing import Any
 
 from zmapsdk.config import ZMapScanConfig
@@ -56,6 +57,8 @@ class ZMap:
             zmap_path: Path to the zmap executable (defaults to "zmap", assuming it's in PATH)
         """
         self.runner = ZMapRunner(zmap_path)
+        # Discovery results from the zmap binary, cleared by refresh()
+        self._discovery_cache: dict[Any, Any] = {}
         self.config = ZMapScanConfig()
         self.input = ZMapInput()
         self.output = ZMapOutput()
@@ -81,6 +84,66 @@ class ZMap:
         Returns:
             List of IP addresses that responded
         """
+        scan_config, scan_input, scan_output, extra_options = self._build_scan_configs(
+            target_port, subnets, output_file, kwargs
+        )
+
+        # Execute the scan
+        return self.runner.scan(
+            config=scan_config,
+            input_config=scan_input,
+            output_config=scan_output,
+            callback=callback,
+            **extra_options,
+        )
+
+    def scan_iter(
+        self,
+        target_port: int | None = None,
+        subnets: list[str] | None = None,
+        **kwargs: Any,
+    ) -> Iterator[str]:
+        """
+        Perform a scan and yield results as they arrive instead of collecting them
+
+        Args:
+            target_port: Port number to scan
+            subnets: List of subnets to scan (defaults to scanning the internet)
+            **kwargs: Additional parameters to pass to ZMap
+
+        Returns:
+            Iterator of IP addresses that responded
+        """
+        scan_config, scan_input, scan_output, extra_options = self._build_scan_configs(
+            target_port, subnets, None, kwargs
+        )
+
+        return self.runner.scan_iter(
+            config=scan_config,
+            input_config=scan_input,
+            output_config=scan_output,
+            **extra_options,
+        )
+
+    def _build_scan_configs(
+        self,
+        target_port: int | None,
+        subnets: list[str] | None,
+        output_file: str | None,
+        options: dict[str, Any],
+    ) -> tuple[ZMapScanConfig, ZMapInput, ZMapOutput, dict[str, Any]]:
+        """
+        Build the configuration objects for a single scan
+
+        Args:
+            target_port: Port number to scan
+            subnets: List of subnets to scan
+            output_file: Output file
+            options: Additional scan options
+
+        Returns:
+            Tuple of (scan config, input config, output config, extra zmap options)
+        """
         # Initialize scan configurations
         scan_config = ZMapScanConfig()
         scan_input = ZMapInput()
@@ -97,23 +160,19 @@ class ZMap:
             scan_output.set_output_file(output_file)
 
         # Distribute additional parameters to appropriate configuration objects
-        self._process_scan_options(kwargs, scan_config, scan_input, scan_output)
-
-        # Execute the scan
-        return self.runner.scan(
-            config=scan_config,
-            input_config=scan_input,
-            output_config=scan_output,
-            callback=callback,
+        extra_options = self._process_scan_options(
+            options, scan_config, scan_input, scan_output
         )
 
+        return scan_config, scan_input, scan_output, extra_options
+
     @staticmethod
     def _process_scan_options(
         options: dict[str, Any],
         scan_config: ZMapScanConfig,
         scan_input: ZMapInput,
         scan_output: ZMapOutput,
-    ) -> None:
+    ) -> dict[str, Any]:
         """
         Process and distribute scan options to appropriate configuration objects.
 
@@ -122,14 +181,22 @@ class ZMap:
             scan_config: ZMap scan configuration object
             scan_input: ZMap input configuration object
             scan_output: ZMap output configuration object
+
+        Returns:
+            Options with no matching configuration field, to pass to zmap directly
         """
+        config_fields = {f.name for f in fields(scan_config)}
+        extra_options = {}
         for key, value in options.items():
             if key in ZMapOptionCategories.INPUT_OPTIONS:
                 setattr(scan_input, key, value)
             elif key in ZMapOptionCategories.OUTPUT_OPTIONS:
                 setattr(scan_output, key, value)
-            else:
+            elif key in config_fields:
                 setattr(scan_config, key, value)
+            else:
+                extra_options[key] = value
+        return extra_options
 
     def run(self, **kwargs: Any) -> tuple[int, str, str]:
         """
@@ -150,7 +217,7 @@ class ZMap:
         Returns:
             List of available probe module names
         """
-        return self.runner.get_probe_modules()
+        return list(self._cached("probe_modules", self.runner.get_probe_modules))
 
     def get_output_modules(self) -> list[str]:
         """
@@ -159,7 +226,7 @@ class ZMap:
         Returns:
             List of available output module names
         """
-        return self.runner.get_output_modules()
+        return list(self._cached("output_modules", self.runner.get_output_modules))
 
     def get_output_fields(self, probe_module: str | None = None) -> list[str]:
         """
@@ -171,7 +238,30 @@ class ZMap:
         Returns:
             List of available output field names
         """
-        return self.runner.get_output_fields(probe_module)
+        # Only cache known modules so arbitrary names can't grow the cache
+        if probe_module is not None and probe_module not in self.get_probe_modules():
+            return self.runner.get_output_fields(probe_module)
+        return list(
+            self._cached(
+                ("output_fields", probe_module),
+                self.runner.get_output_fields,
+                probe_module,
+            )
+        )
+
+    def refresh(self) -> None:
+        """
+        Clear cached probe modules, output modules, output fields and version
+
+        Call this after the zmap binary has been upgraded or replaced.
+        """
+        self._discovery_cache.clear()
+
+    def _cached(self, key: Any, func: Callable[..., Any], *args: Any) -> Any:
+        """Return a cached discovery result, running zmap only on a miss"""
+        if key not in self._discovery_cache:
+            self._discovery_cache[key] = func(*args)
+        return self._discovery_cache[key]
 
     def get_interfaces(self) -> list[str]:
         """
@@ -189,7 +279,7 @@ class ZMap:
         Returns:
             Version string
         """
-        return self.runner.get_version()
+        return self._cached("version", self.runner.get_version)
 
     def blocklist_from_file(self, blocklist_file: str) -> None:
         """
@@ -8,6 +8,37 @@ from typing import Any
 
 from zmapsdk.exceptions import ZMapInputError
 
+# Most buffers the kernel accepts in one writev() call
+try:
+    _IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = -1
+if _IOV_MAX <= 0:
+    _IOV_MAX = 1024
+
+
+def _write_lines(lines: list[str], output_file: str) -> None:
+    """Write one entry per line, gathering the lines into writev() calls"""
+    buffers = [f"{line}\n".encode() for line in lines]
+
+    if not hasattr(os, "writev"):
+        with open(output_file, "wb") as f:
+            f.write(b"".join(buffers))
+        return
+
+    fd = os.open(output_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        for start in range(0, len(buffers), _IOV_MAX):
+            chunk = buffers[start : start + _IOV_MAX]
+            written = os.writev(fd, chunk)
+            if written < sum(map(len, chunk)):
+                # Finish a short write with plain write() calls
+                remaining = b"".join(chunk)[written:]
+                while remaining:
+                    remaining = remaining[os.write(fd, remaining) :]
+    finally:
+        os.close(fd)
+
 
 class ZMapInput:
     """
@@ -123,8 +154,7 @@ class ZMapInput:
 
         # Write to file
         try:
-            with open(output_file, "w") as f:
-                f.write("\n".join(subnets))
+            _write_lines(subnets, output_file)
         except OSError as e:
             raise ZMapInputError(f"Failed to create blocklist file: {e!s}")
 
@@ -154,8 +184,7 @@ class ZMapInput:
 
         # Write to file
         try:
-            with open(output_file, "w") as f:
-                f.write("\n".join(subnets))
+            _write_lines(subnets, output_file)
         except OSError as e:
             raise ZMapInputError(f"Failed to create allowlist file: {e!s}")
 
@@ -185,8 +214,7 @@ class ZMapInput:
 
         # Write to file
         try:
-            with open(output_file, "w") as f:
-                f.write("\n".join(targets))
+            _write_lines(targets, output_file)
         except OSError as e:
             raise ZMapInputError(f"Failed to create target file: {e!s}")
 
@@ -5,7 +5,7 @@ Runner module for ZMap SDK
 import os
 import subprocess
 import tempfile
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
 
 from zmapsdk.config import ZMapScanConfig
 from zmapsdk.exceptions import ZMapCommandError
@@ -251,6 +251,97 @@ class ZMapRunner:
                 except OSError:
                     pass
 
+    def scan_iter(
+        self,
+        config: ZMapScanConfig | None = None,
+        input_config: ZMapInput | None = None,
+        output_config: ZMapOutput | None = None,
+        **kwargs,
+    ) -> Iterator[str]:
+        """
+        Perform a scan and yield each IP address as zmap reports it
+
+        Results are read from zmap's stdout instead of an output file, so the
+        output file of ``output_config`` is ignored. Closing the iterator early
+        terminates the scan.
+
+        Args:
+            config: Configuration object
+            input_config: Input configuration object
+            output_config: Output configuration object
+            **kwargs: Additional parameters to pass to zmap
+
+        Yields:
+            IP addresses that responded
+
+        Raises:
+            ZMapCommandError: If zmap can't be started or exits with an error
+        """
+        if output_config is None:
+            output_config = ZMapOutput()
+
+        # Write results to stdout so they can be read as they arrive
+        output_config.set_output_file("-")
+        if not output_config.output_module:
+            output_config.set_output_module("csv")
+        if not output_config.output_fields:
+            output_config.set_output_fields("saddr")
+        if not output_config.output_filter and output_config.output_module == "csv":
+            output_config.set_output_filter("success = 1 && repeat = 0")
+
+        header = output_config.output_fields
+        if isinstance(header, list):
+            header = ",".join(header)
+
+        # Combine all parameters; later sources override earlier ones
+        combined_params = {}
+        if config:
+            combined_params.update(config.to_dict())
+        if input_config:
+            combined_params.update(input_config.to_dict())
+        combined_params.update(output_config.to_dict())
+        combined_params.update(kwargs)
+
+        cmd = self._build_command(**combined_params)
+
+        # Status updates go to a file; an undrained stderr pipe would fill up
+        # and stall zmap during long scans
+        with tempfile.TemporaryFile(mode="w+") as stderr_file:
+            try:
+                process = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=stderr_file,
+                    text=True,
+                )
+            except (subprocess.SubprocessError, OSError) as e:
+                raise ZMapCommandError(
+                    command=" ".join(cmd), returncode=-1, stderr=str(e)
+                )
+
+            finished = False
+            try:
+                for line in process.stdout:
+                    ip = line.strip()
+                    # Skip blank lines and the csv output module's header row
+                    if ip and ip != header:
+                        yield ip
+                finished = True
+            finally:
+                # Stop zmap if the caller closed the iterator before the end
+                if not finished and process.poll() is None:
+                    process.kill()
+                process.stdout.close()
+                process.wait()
+
+            if process.returncode != 0:
+                stderr_file.seek(0)
+                raise ZMapCommandError(
+                    command=" ".join(cmd),
+                    returncode=process.returncode,
+                    stderr=stderr_file.read(),
+                )
+
     def get_probe_modules(self) -> list[str]:
         """
         Get list of available probe modules
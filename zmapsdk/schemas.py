@@ -1,7 +1,9 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ScanRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
     target_port: int | None = Field(None, description="Port number to scan")
     subnets: list[str] | None = Field(None, description="List of subnets to scan")
     output_file: str | None = Field(None, description="Output file path")
@@ -20,6 +22,8 @@ class ScanRequest(BaseModel):
 
 
 class ScanResult(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
     scan_id: str
     status: str
     ips_found: list[str] | None = None
@@ -28,14 +32,20 @@ class ScanResult(BaseModel):
 
 
 class BlocklistRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
     subnets: list[str]
     output_file: str | None = None
 
 
 class StandardBlocklistRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
     output_file: str | None = None
 
 
 class FileResponse(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
     file_path: str
     message: str